@@ -1,22 +1,9 @@
-"""
-A sophisticated bot for posting to social media platforms with advanced features.
-Supports media uploads, scheduled posts, and thread creation.
-"""
-
-import json
-import sys
-import os
-import logging
-from typing import Optional, Dict, List, Union
-from datetime import datetime
-from pathlib import Path
-from mastodon import Mastodon
-
 """SocialBot: small Mastodon posting utility.
 
 This module provides a compact, well-logged `SocialBot` class that
 connects to Mastodon, validates configuration (including environment
-overrides), and posts statuses with optional media and visibility.
+overrides), and posts statuses and threads with optional media,
+visibility, scheduling and replies.
 """
 
 from __future__ import annotations
@@ -25,26 +12,132 @@ import argparse
 import json
 import logging
 import os
+import re
 import sys
+import time
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
-from mastodon import Mastodon
+from mastodon import Mastodon, MastodonNetworkError, MastodonServerError
+
+try:
+    import orjson as _json
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    _json = json
 
 CONFIG_FILE = "config.json"
 
 logger = logging.getLogger(__name__)
 
+# Mastodon's default status length limit.
+MAX_STATUS_LENGTH = 500
+# Mastodon counts every URL as this many characters, whatever its real length.
+URL_LENGTH = 23
+_URL_RE = re.compile(r"https?://\S+")
+# Trailing punctuation (e.g. a full stop after a link) is not part of the URL.
+_TRAILING_PUNCTUATION = ".,;:!?)]"
+_OPENING_BRACKETS = {")": "(", "]": "["}
+# Mastodon rejects statuses with more attachments than this.
+MAX_MEDIA_ATTACHMENTS = 4
+VISIBILITIES = frozenset({"public", "unlisted", "private", "direct"})
+# Attempts and initial backoff (seconds) for status posts failing transiently.
+POST_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
 
-def load_config(path: str = CONFIG_FILE) -> dict:
+
+class PostError(Exception):
+    """Raised when a status or its media cannot be posted."""
+
+
+def _count_url(match: re.Match) -> str:
+    """Replace a matched URL with `URL_LENGTH` placeholder characters.
+
+    Trailing punctuation is kept outside the URL, except a closing bracket
+    that balances one inside it, as in ``https://en.wikipedia.org/wiki/Foo_(bar)``.
+    """
+    url = match.group(0)
+    end = len(url)
+    while end and url[end - 1] in _TRAILING_PUNCTUATION:
+        closing = url[end - 1]
+        opening = _OPENING_BRACKETS.get(closing)
+        if opening and url.count(opening, 0, end) >= url.count(closing, 0, end):
+            break
+        end -= 1
+    return "x" * URL_LENGTH + url[end:]
+
+
+def _status_length(content: str) -> int:
+    """Return the length of `content` as Mastodon counts it."""
+    if "://" not in content:
+        return len(content)
+    return len(_URL_RE.sub(_count_url, content))
+
+
+def _validate_batch(posts: list[str], visibility: str) -> str:
+    """Validate every post in `posts` before any of them is sent.
+
+    Returns `visibility` lowercased, as Mastodon.py accepts it in any case.
+    Raises `PostError` if anything would be rejected by Mastodon.
+    """
+    visibility = visibility.lower()
+    if visibility not in VISIBILITIES:
+        raise PostError(f"Invalid visibility {visibility!r}; expected one of {', '.join(sorted(VISIBILITIES))}")
+    for post in posts:
+        if _status_length(post) > MAX_STATUS_LENGTH:
+            raise PostError(f"Content exceeds Mastodon's character limit of {MAX_STATUS_LENGTH}")
+    return visibility
+
+
+@dataclass
+class MastodonConfig:
+    """Connection settings for a Mastodon account."""
+
+    __slots__ = ("api_base_url", "access_token")
+
+    api_base_url: str
+    access_token: str
+
+
+@dataclass
+class Config:
+    """Validated bot configuration."""
+
+    __slots__ = ("mastodon",)
+
+    mastodon: MastodonConfig
+
+
+# Parsed contents of the config file, reused until its (mtime_ns, size) changes.
+_CONFIG_CACHE: dict = {"path": None, "key": None, "data": None}
+
+
+def _read_config_file(path: str) -> dict:
+    """Return the parsed JSON in `path`, re-reading it only when it changed on disk."""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    if _CONFIG_CACHE["path"] == path and _CONFIG_CACHE["key"] == key:
+        return _CONFIG_CACHE["data"]
+
+    with open(path, "rb") as f:
+        data = _json.loads(f.read())
+    _CONFIG_CACHE.update(path=path, key=key, data=data)
+    return data
+
+
+def load_config(path: str = CONFIG_FILE) -> Config:
     """Load configuration from JSON file and override with environment vars.
 
     Environment variables `MASTODON_API_BASE_URL` and `MASTODON_ACCESS_TOKEN`
-    will override values from the file when present.
+    will override values from the file when present. The parsed file is
+    cached and only re-read when its modification time or size changes.
     """
     cfg = {}
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            cfg = json.load(f)
+        cfg = _read_config_file(path)
     except FileNotFoundError:
         logger.warning("Config file %s not found; falling back to environment variables.", path)
     except json.JSONDecodeError as e:
@@ -60,64 +153,160 @@ def load_config(path: str = CONFIG_FILE) -> dict:
         logger.error("Mastodon configuration incomplete. Provide api_base_url and access_token via %s or environment.", path)
         sys.exit(1)
 
-    return {"mastodon": {"api_base_url": api_base, "access_token": access_token}}
+    return Config(mastodon=MastodonConfig(api_base_url=api_base, access_token=access_token))
 
 
 class SocialBot:
     """Encapsulates Mastodon client operations."""
 
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: Config) -> None:
         self.config = config
         self.client: Optional[Mastodon] = None
 
     def connect(self) -> None:
-        """Create a Mastodon client and verify credentials."""
-        mast_cfg = self.config["mastodon"]
+        """Create a Mastodon client and verify credentials.
+
+        The client is created once; calling `connect()` again reuses it rather
+        than opening a new session and re-verifying credentials.
+        """
+        if self.client is not None:
+            return
+        mast_cfg = self.config.mastodon
         try:
-            self.client = Mastodon(
-                access_token=mast_cfg["access_token"], api_base_url=mast_cfg["api_base_url"]
+            client = Mastodon(
+                access_token=mast_cfg.access_token, api_base_url=mast_cfg.api_base_url
             )
-            self.client.account_verify_credentials()
-            logger.info("Connected to Mastodon at %s", mast_cfg["api_base_url"])
+            client.account_verify_credentials()
+            # Only keep the client once its credentials are known to be good
+            self.client = client
+            logger.info("Connected to Mastodon at %s", mast_cfg.api_base_url)
         except Exception as exc:  # keep broad to surfacing API/client errors
             logger.exception("Failed to connect to Mastodon: %s", exc)
             raise
 
-    def post(self, content: str, visibility: str = "public", media_path: Optional[str] = None) -> None:
-        """Post `content` to Mastodon with optional `media_path` and `visibility`.
+    def _status_post(self, **params) -> dict:
+        """Call `status_post`, retrying network errors and 5xx responses with backoff.
 
-        `visibility` can be one of: public, unlisted, private, direct.
+        A single idempotency key is sent with every attempt so a retry of a
+        request that did reach the server cannot create a duplicate status.
+        """
+        params["idempotency_key"] = uuid.uuid4().hex
+        for attempt in range(1, POST_ATTEMPTS + 1):
+            try:
+                return self.client.status_post(**params)
+            except (MastodonNetworkError, MastodonServerError) as exc:
+                if attempt == POST_ATTEMPTS:
+                    raise
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                logger.warning(
+                    "Posting failed (attempt %d/%d): %s; retrying in %.0fs", attempt, POST_ATTEMPTS, exc, delay
+                )
+                time.sleep(delay)
+
+    def post(
+        self,
+        content: str,
+        visibility: str = "public",
+        media_paths: Optional[list[str]] = None,
+        scheduled_at: Optional[datetime] = None,
+        in_reply_to_id: Optional[str] = None,
+        media_path: Optional[str] = None,
+    ) -> dict:
+        """Post `content` to Mastodon and return the created status.
+
+        `visibility` can be one of: public, unlisted, private, direct. Files in
+        `media_paths` are uploaded concurrently and attached to the status.
+        `media_path` is a deprecated single-file alias for `media_paths`.
+        Transient network and server errors are retried. Raises `PostError`
+        if validation, upload or posting fails.
         """
         if not self.client:
             raise RuntimeError("Client not connected. Call connect() before posting.")
 
-        media_ids = None
-        if media_path:
-            if not os.path.exists(media_path):
-                logger.error("Media file not found: %s", media_path)
-                raise FileNotFoundError(media_path)
-            try:
-                logger.debug("Uploading media: %s", media_path)
-                media = self.client.media_post(media_path)
-                media_ids = [media["id"]]
-            except Exception as exc:
-                logger.exception("Failed to upload media: %s", exc)
-                raise
-
+        if media_path is not None:
+            if media_paths is not None:
+                raise TypeError("Pass either media_path or media_paths, not both.")
+            warnings.warn("media_path is deprecated; use media_paths", DeprecationWarning, stacklevel=2)
+            media_paths = [media_path]
+
+        visibility = _validate_batch([content], visibility)
+        if media_paths and len(media_paths) > MAX_MEDIA_ATTACHMENTS:
+            raise PostError(f"At most {MAX_MEDIA_ATTACHMENTS} media files can be attached, got {len(media_paths)}")
+        return self._post(content, visibility, media_paths, scheduled_at, in_reply_to_id)
+
+    def _post(
+        self,
+        content: str,
+        visibility: str,
+        media_paths: Optional[list[str]] = None,
+        scheduled_at: Optional[datetime] = None,
+        in_reply_to_id: Optional[str] = None,
+    ) -> dict:
+        """Upload media and post an already-validated status; see `post()`."""
         try:
+            media_ids = []
+            if media_paths:
+                # Check every file before uploading anything
+                for media_path in media_paths:
+                    if not os.path.isfile(media_path):
+                        raise PostError(f"Media file not found: {media_path}")
+                # Uploads are independent, so run them concurrently
+                logger.debug("Uploading media: %s", ", ".join(media_paths))
+                with ThreadPoolExecutor(max_workers=min(len(media_paths), MAX_MEDIA_ATTACHMENTS)) as executor:
+                    media_ids = [media["id"] for media in executor.map(self.client.media_post, media_paths)]
+
+            post_params = {"status": content, "visibility": visibility}
+            if media_ids:
+                post_params["media_ids"] = media_ids
+            if scheduled_at is not None:
+                post_params["scheduled_at"] = scheduled_at
+            if in_reply_to_id is not None:
+                post_params["in_reply_to_id"] = in_reply_to_id
+
             logger.info("Posting status (visibility=%s): %s", visibility, content)
-            self.client.status_post(status=content, media_ids=media_ids, visibility=visibility)
+            response = self._status_post(**post_params)
             logger.info("Posted successfully.")
-        except Exception as exc:
-            logger.exception("Failed to post status: %s", exc)
+            return response
+        except PostError:
             raise
+        except Exception as exc:
+            logger.debug("Failed to post content", exc_info=True)
+            raise PostError(f"Failed to post content: {exc}") from exc
+
+    def create_thread(self, posts: list[str], visibility: str = "public") -> list[dict]:
+        """Post `posts` as a thread, each replying to the previous one.
+
+        Every post is validated before the first one is sent, so an invalid
+        post cannot leave a half-posted thread behind. Returns the created
+        statuses in order.
+        """
+        if not self.client:
+            raise RuntimeError("Client not connected. Call connect() before posting.")
+
+        visibility = _validate_batch(posts, visibility)
+
+        responses = []
+        previous_id = None
+
+        for post in posts:
+            response = self._post(post, visibility, in_reply_to_id=previous_id)
+            responses.append(response)
+            previous_id = response["id"]
+
+        return responses
 
 
 def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Post a status to Mastodon using SocialBot.")
     parser.add_argument("message", help="Text content to post")
-    parser.add_argument("--visibility", default="public", help="Visibility: public/unlisted/private/direct")
-    parser.add_argument("--media", help="Path to media file to attach")
+    parser.add_argument(
+        "--visibility",
+        default="public",
+        type=str.lower,
+        choices=sorted(VISIBILITIES),
+        help="Visibility: public/unlisted/private/direct",
+    )
+    parser.add_argument("--media", action="append", help="Path to media file to attach (repeatable)")
     parser.add_argument("--config", default=CONFIG_FILE, help="Path to config.json file")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
 
@@ -129,7 +318,10 @@ def main(argv: Optional[list[str]] = None) -> int:
     bot = SocialBot(config)
     try:
         bot.connect()
-        bot.post(args.message, visibility=args.visibility, media_path=args.media)
+        bot.post(args.message, visibility=args.visibility, media_paths=args.media)
+    except PostError as exc:
+        logger.error("%s", exc)
+        return 1
     except Exception:
         logger.error("Operation failed. See logs for details.")
         return 1
@@ -139,135 +331,3 @@ def main(argv: Optional[list[str]] = None) -> int:
 
 if __name__ == "__main__":
     raise SystemExit(main())
-            if not config['mastodon'].get('access_token'):
-                raise ConfigError("Missing Mastodon access token")
-            if not config['mastodon'].get('api_base_url'):
-                raise ConfigError("Missing Mastodon API URL")
-                
-            return config
-            
-        except FileNotFoundError:
-            raise ConfigError(f"Configuration file {self.config_path} not found")
-        except json.JSONDecodeError:
-            raise ConfigError(f"Invalid JSON in configuration file {self.config_path}")
-    
-    def _connect_to_mastodon(self) -> Mastodon:
-        """Establish connection to Mastodon API.
-        
-        Returns:
-            Mastodon: Authenticated Mastodon client instance
-            
-        Raises:
-            ConfigError: If connection fails
-        """
-        try:
-            mastodon_config = self.config['mastodon']
-            client = Mastodon(
-                access_token=mastodon_config['access_token'],
-                api_base_url=mastodon_config['api_base_url']
-            )
-            # Verify credentials
-            client.account_verify_credentials()
-            logger.info("Successfully connected to Mastodon")
-            return client
-            
-        except Exception as e:
-            raise ConfigError(f"Failed to connect to Mastodon: {str(e)}")
-    
-    def post(self, content: str, media_files: Optional[List[str]] = None, 
-             visibility: str = 'public', scheduled_at: Optional[datetime] = None,
-             in_reply_to_id: Optional[str] = None) -> Dict:
-        """Post content to Mastodon with optional media attachments.
-        
-        Args:
-            content: The text content to post
-            media_files: Optional list of paths to media files to attach
-            visibility: Post visibility ('public', 'unlisted', 'private', 'direct')
-            scheduled_at: Optional datetime for scheduled posting
-            in_reply_to_id: Optional ID of post to reply to
-            
-        Returns:
-            Dict: Response from Mastodon API
-            
-        Raises:
-            PostError: If posting fails
-        """
-        try:
-            # Validate content length
-            if len(content) > 500:  # Mastodon's character limit
-                raise PostError("Content exceeds Mastodon's character limit of 500")
-            
-            # Handle media attachments
-            media_ids = []
-            if media_files:
-                for media_file in media_files:
-                    if not Path(media_file).exists():
-                        raise PostError(f"Media file not found: {media_file}")
-                    media = self.client.media_post(media_file)
-                    media_ids.append(media['id'])
-            
-            # Prepare post parameters
-            post_params = {
-                'status': content,
-                'visibility': visibility,
-                'media_ids': media_ids if media_ids else None,
-                'scheduled_at': scheduled_at,
-                'in_reply_to_id': in_reply_to_id
-            }
-            
-            # Remove None values
-            post_params = {k: v for k, v in post_params.items() if v is not None}
-            
-            # Post to Mastodon
-            response = self.client.status_post(**post_params)
-            logger.info(f"Successfully posted to Mastodon: {content[:50]}...")
-            return response
-            
-        except Exception as e:
-            raise PostError(f"Failed to post content: {str(e)}")
-    
-    def create_thread(self, posts: List[str], visibility: str = 'public') -> List[Dict]:
-        """Create a thread of connected posts.
-        
-        Args:
-            posts: List of post contents
-            visibility: Visibility level for all posts in thread
-            
-        Returns:
-            List[Dict]: List of responses from Mastodon API
-        """
-        responses = []
-        previous_id = None
-        
-        for post in posts:
-            response = self.post(post, visibility=visibility, in_reply_to_id=previous_id)
-            responses.append(response)
-            previous_id = response['id']
-        
-        return responses
-
-def main():
-    """Main entry point for the bot."""
-    try:
-        bot = SocialBot()
-        
-        # Example usage
-        # Simple post
-        bot.post("Hello world from my enhanced Python bot! 🤖 #bot")
-        
-        # Thread creation
-        bot.create_thread([
-            "1/3 This is the start of a thread!",
-            "2/3 Here's the middle part...",
-            "3/3 And this is the end!"
-        ])
-        
-    except (ConfigError, PostError) as e:
-        logger.error(str(e))
-        sys.exit(1)
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        sys.exit(1)
-
-if __name__ == '__main__':
-    main()
\ No newline at end of file
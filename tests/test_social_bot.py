@@ -0,0 +1,184 @@
+import os
+import time
+
+import pytest
+from mastodon import MastodonAPIError, MastodonNetworkError, MastodonServerError
+
+import social_bot
+from social_bot import Config, MastodonConfig, PostError, SocialBot
+
+
+class StubClient:
+    """Records status_post calls and raises the queued errors first."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+        self.uploads = []
+
+    def media_post(self, media_path):
+        # Later files finish first, so ordering bugs would show up
+        time.sleep(0.01 * (5 - len(self.uploads)))
+        self.uploads.append(media_path)
+        return {"id": os.path.basename(media_path)}
+
+    def status_post(self, **params):
+        self.calls.append(params)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"id": len(self.calls), **params}
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(social_bot.time, "sleep", lambda _: None)
+
+
+def make_bot(client):
+    bot = SocialBot(Config(mastodon=MastodonConfig(api_base_url="https://example.social", access_token="t")))
+    bot.client = client
+    return bot
+
+
+def test_status_post_retries_transient_errors_with_same_key(no_sleep):
+    client = StubClient([MastodonNetworkError("reset"), MastodonServerError("502")])
+    response = make_bot(client)._status_post(status="hi")
+
+    assert response["id"] == 3
+    keys = {call["idempotency_key"] for call in client.calls}
+    assert len(client.calls) == social_bot.POST_ATTEMPTS
+    assert len(keys) == 1
+
+
+def test_status_post_reraises_after_last_attempt(no_sleep):
+    client = StubClient([MastodonServerError("503")] * social_bot.POST_ATTEMPTS)
+
+    with pytest.raises(MastodonServerError):
+        make_bot(client)._status_post(status="hi")
+    assert len(client.calls) == social_bot.POST_ATTEMPTS
+
+
+def test_status_post_does_not_retry_client_errors():
+    client = StubClient([MastodonAPIError("422")])
+
+    with pytest.raises(MastodonAPIError):
+        make_bot(client)._status_post(status="hi")
+    assert len(client.calls) == 1
+
+
+def test_post_wraps_exhausted_retries_in_post_error(no_sleep):
+    client = StubClient([MastodonServerError("503")] * social_bot.POST_ATTEMPTS)
+
+    with pytest.raises(PostError):
+        make_bot(client).post("hi")
+
+
+def test_post_normalizes_visibility():
+    client = StubClient()
+    make_bot(client).post("hi", visibility="Public")
+
+    assert client.calls[0]["visibility"] == "public"
+
+
+def test_create_thread_rejects_invalid_post_before_sending():
+    client = StubClient()
+
+    with pytest.raises(PostError):
+        make_bot(client).create_thread(["ok", "x" * (social_bot.MAX_STATUS_LENGTH + 1)])
+    assert client.calls == []
+
+
+def test_post_logs_content_once(caplog):
+    caplog.set_level("INFO", logger="social_bot")
+    make_bot(StubClient()).post("hello there")
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "Posting status (visibility=public): hello there",
+        "Posted successfully.",
+    ]
+
+
+@pytest.fixture
+def media_files(tmp_path):
+    paths = []
+    for name in ("a.png", "b.png", "c.png", "d.png", "e.png"):
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        paths.append(str(path))
+    return paths
+
+
+def test_post_attaches_media_in_given_order(media_files):
+    client = StubClient()
+    make_bot(client).post("hi", media_paths=media_files[:4])
+
+    assert client.calls[0]["media_ids"] == ["a.png", "b.png", "c.png", "d.png"]
+
+
+def test_post_accepts_deprecated_media_path(media_files):
+    client = StubClient()
+
+    with pytest.warns(DeprecationWarning):
+        make_bot(client).post("hi", media_path=media_files[0])
+    assert client.calls[0]["media_ids"] == ["a.png"]
+
+
+def test_post_rejects_missing_media_before_uploading(media_files):
+    client = StubClient()
+
+    with pytest.raises(PostError, match="not found"):
+        make_bot(client).post("hi", media_paths=[media_files[0], "/nonexistent/missing.png"])
+    assert client.uploads == []
+    assert client.calls == []
+
+
+def test_post_rejects_too_many_attachments(media_files):
+    client = StubClient()
+
+    with pytest.raises(PostError, match="At most"):
+        make_bot(client).post("hi", media_paths=media_files)
+    assert client.uploads == []
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("hello", 5),
+        ("https://example.com/" + "a" * 100, social_bot.URL_LENGTH),
+        ("see https://example.com.", 4 + social_bot.URL_LENGTH + 1),
+        ("(https://example.com/a)!", 1 + social_bot.URL_LENGTH + 2),
+        ("https://en.wikipedia.org/wiki/Foo_(bar)", social_bot.URL_LENGTH),
+        ("(https://en.wikipedia.org/wiki/Foo_(bar)).", 1 + social_bot.URL_LENGTH + 2),
+    ],
+)
+def test_status_length_counts_urls_as_mastodon_does(content, expected):
+    assert social_bot._status_length(content) == expected
+
+
+@pytest.fixture
+def config_cache(monkeypatch):
+    monkeypatch.setattr(social_bot, "_CONFIG_CACHE", {"path": None, "key": None, "data": None})
+
+
+def test_read_config_file_reuses_cache_until_mtime_changes(tmp_path, config_cache):
+    path = tmp_path / "config.json"
+    path.write_text('{"mastodon": {"access_token": "a"}}')
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    first = social_bot._read_config_file(str(path))
+    assert social_bot._read_config_file(str(path)) is first
+
+    path.write_text('{"mastodon": {"access_token": "b"}}')
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert social_bot._read_config_file(str(path))["mastodon"]["access_token"] == "b"
+
+
+def test_read_config_file_notices_rewrite_within_same_mtime(tmp_path, config_cache):
+    path = tmp_path / "config.json"
+    path.write_text('{"a": 1}')
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert social_bot._read_config_file(str(path)) == {"a": 1}
+
+    path.write_text('{"a": 22}')
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert social_bot._read_config_file(str(path)) == {"a": 22}